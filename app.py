@@ -2,8 +2,14 @@ import streamlit as st
 import pandas as pd
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from utils.data import (
+    LISTINGS_COLUMNS, LISTINGS_DTYPES, DETAILED_COLUMNS, DETAILED_DTYPES, REVIEWS_SAMPLE_CACHE,
+    load_calendar, read_cached_csv, sample_reviews
+)
+
 # Handle optional imports with fallbacks
 try:
     import plotly.express as px
@@ -72,7 +78,27 @@ st.markdown('<h1 class="main-header">🏠 Airbnb Analytics Dashboard</h1>', unsa
 st.markdown('<p class="sub-header">Explore comprehensive insights from Airbnb listings data</p>', unsafe_allow_html=True)
 
 # ------------------ DATA LOADING WITH ERROR HANDLING ------------------
-@st.cache_data
+# Only load the columns the dashboard uses, with numeric types declared up front and
+# low-cardinality strings stored as categoricals
+USECOLS_DETAILED = DETAILED_COLUMNS + ['review_scores_location']
+DTYPES_DETAILED = {**DETAILED_DTYPES, 'review_scores_location': 'float32'}
+USECOLS_REVIEWS = ['listing_id', 'comments']
+USECOLS_CALENDAR = ['listing_id', 'date', 'available', 'price', 'adjusted_price']
+
+def read_dataset(key, file_path):
+    """Read one dataset with the columns and dtypes the dashboard uses"""
+    if key == 'listings':
+        return read_cached_csv(file_path, columns=LISTINGS_COLUMNS).astype(LISTINGS_DTYPES)
+    if key == 'detailed_listings':
+        return read_cached_csv(file_path, columns=USECOLS_DETAILED).astype(DTYPES_DETAILED)
+    if key == 'reviews':
+        # Sample reviews for performance without loading the whole file
+        return read_cached_csv(file_path, columns=USECOLS_REVIEWS, parse=sample_reviews, cache_path=file_path.parent / REVIEWS_SAMPLE_CACHE)
+    if key == 'calendar':
+        return read_cached_csv(file_path, columns=USECOLS_CALENDAR, parse=load_calendar, dtype_backend='pyarrow')
+    return gpd.read_file(file_path)
+
+@st.cache_resource
 def load_data():
     """Load all required datasets with proper error handling"""
     
@@ -115,32 +141,27 @@ def load_data():
                 'neighbourhoods': 'neighbourhoods.geojson'
             }
             
-            # Load each file
-            for key, filename in required_files.items():
-                file_path = data_path / filename
-                
-                if not file_path.exists():
-                    st.warning(f"⚠️ File not found: {filename}")
-                    continue
-                
-                try:
-                    if filename.endswith('.csv'):
-                        if key == 'reviews':
-                            # Sample reviews for performance
-                            df = pd.read_csv(file_path)
-                            datasets[key] = df.sample(min(2000, len(df)), random_state=42)
-                        else:
-                            datasets[key] = pd.read_csv(file_path)
-                    elif filename.endswith('.geojson'):
-                        if GEOPANDAS_AVAILABLE:
-                            datasets[key] = gpd.read_file(file_path)
-                        else:
-                            st.warning(f"⚠️ GeoPandas not available. Skipping {filename}")
+            # Read the files concurrently; the Arrow CSV and Parquet readers release the GIL
+            with ThreadPoolExecutor(max_workers=len(required_files)) as executor:
+                futures = {}
+                for key, filename in required_files.items():
+                    file_path = data_path / filename
                     
-                    st.success(f"✅ Loaded {filename}")
-                    
-                except Exception as e:
-                    st.error(f"❌ Error loading {filename}: {str(e)}")
+                    if not file_path.exists():
+                        st.warning(f"⚠️ File not found: {filename}")
+                    elif filename.endswith('.geojson') and not GEOPANDAS_AVAILABLE:
+                        st.warning(f"⚠️ GeoPandas not available. Skipping {filename}")
+                    else:
+                        futures[key] = executor.submit(read_dataset, key, file_path)
+                
+                # Streamlit calls stay on the script thread
+                for key, future in futures.items():
+                    filename = required_files[key]
+                    try:
+                        datasets[key] = future.result()
+                        st.success(f"✅ Loaded {filename}")
+                    except Exception as e:
+                        st.error(f"❌ Error loading {filename}: {str(e)}")
             
             return datasets
             
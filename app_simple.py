@@ -1,9 +1,21 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from utils.data import REVIEWS_SAMPLE_CACHE, load_calendar, read_cached_csv, sample_reviews, top_k
+
+# Plotly is optional; matplotlib remains the fallback renderer
+try:
+    import plotly.express as px
+    import plotly.graph_objects as go
+    PLOTLY_AVAILABLE = True
+except ImportError:
+    PLOTLY_AVAILABLE = False
+
 # ------------------ CONFIG ------------------
 st.set_page_config(
     page_title="🏠 Airbnb Dashboard (Simple)",
@@ -37,7 +49,34 @@ st.markdown("**Analyzing Airbnb listings data from London, UK**")
 st.caption("Data source: [Inside Airbnb](https://insideairbnb.com/get-the-data.html)")
 
 # ------------------ DATA LOADING ------------------
-@st.cache_data
+# Repeated string columns are stored as categoricals so groupby/value_counts use integer codes
+CATEGORICAL_COLUMNS = ('host_name', 'neighbourhood', 'room_type')
+
+def downcast_numeric(df):
+    """Shrink float64/int64 columns to the smallest dtype that holds their values"""
+    for col in df.select_dtypes(include='float64').columns:
+        df[col] = pd.to_numeric(df[col], downcast='float')
+    for col in df.select_dtypes(include='int64').columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+def read_dataset(key, file_path):
+    """Read one dataset and shrink its dtypes"""
+    if key == 'calendar':
+        df = read_cached_csv(file_path, parse=load_calendar, dtype_backend='pyarrow')
+    elif key == 'reviews':
+        # Sample while streaming so the full file is never held in memory
+        df = read_cached_csv(file_path, parse=sample_reviews, cache_path=file_path.parent / REVIEWS_SAMPLE_CACHE)
+    else:
+        df = read_cached_csv(file_path)
+    if key in ('listings', 'detailed_listings'):
+        df = downcast_numeric(df)
+        for col in CATEGORICAL_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+    return df
+
+@st.cache_resource
 def load_data():
     """Load datasets with simple error handling"""
     data_dir = Path("Data")
@@ -58,13 +97,18 @@ def load_data():
             'calendar': 'calendar.csv'
         }
         
+        # Read the files concurrently; the Arrow CSV and Parquet readers release the GIL
+        with ThreadPoolExecutor(max_workers=len(files)) as executor:
+            futures = {
+                key: executor.submit(read_dataset, key, data_dir / filename)
+                for key, filename in files.items()
+                if (data_dir / filename).exists()
+            }
+        
         for key, filename in files.items():
-            file_path = data_dir / filename
-            if file_path.exists():
+            if key in futures:
                 try:
-                    df = pd.read_csv(file_path)
-                    if key == 'reviews' and len(df) > 2000:
-                        df = df.sample(2000, random_state=42)
+                    df = futures[key].result()
                     datasets[key] = df
                     st.success(f"✅ Loaded {filename} ({len(df):,} rows)")
                 except Exception as e:
@@ -78,6 +122,35 @@ def load_data():
         st.error(f"❌ Error loading data: {e}")
         return None
 
+@st.cache_data
+def histogram_bins(values, bins):
+    """Bin values server-side so only the bar heights are rendered"""
+    values = values[~np.isnan(values)]
+    return np.histogram(values, bins=bins)
+
+def plot_histogram(values, bins, title, xlabel, ylabel):
+    """Render a pre-binned histogram with Plotly, or matplotlib as a fallback"""
+    counts, edges = histogram_bins(values, bins)
+    
+    if PLOTLY_AVAILABLE:
+        fig = go.Figure(go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=counts,
+            width=np.diff(edges),
+            marker_color='#FF5A5F',
+            opacity=0.7
+        ))
+        fig.update_layout(title=title, xaxis_title=xlabel, yaxis_title=ylabel, bargap=0)
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        fig, ax = plt.subplots(figsize=(10, 6))
+        ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', alpha=0.7, color='#FF5A5F')
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        ax.set_title(title)
+        ax.grid(True, alpha=0.3)
+        st.pyplot(fig)
+
 # Load data
 data = load_data()
 
@@ -139,56 +212,76 @@ elif analysis_type == "Price Analysis":
         listings = data['listings']
         
         if 'price' in listings.columns:
+            prices = listings['price'].to_numpy(dtype='float64', na_value=np.nan)
             col1, col2 = st.columns(2)
             
             with col1:
                 st.subheader("📊 Price Distribution")
                 
-                # Simple histogram with matplotlib
-                fig, ax = plt.subplots(figsize=(10, 6))
-                ax.hist(listings['price'], bins=50, alpha=0.7, color='#FF5A5F')
-                ax.set_xlabel('Price (£)')
-                ax.set_ylabel('Number of Listings')
-                ax.set_title('Distribution of Listing Prices')
-                ax.grid(True, alpha=0.3)
-                st.pyplot(fig)
+                plot_histogram(
+                    prices,
+                    bins=50,
+                    title='Distribution of Listing Prices',
+                    xlabel='Price (£)',
+                    ylabel='Number of Listings'
+                )
             
             with col2:
                 st.subheader("📈 Price Statistics")
                 
-                price_stats = listings['price'].describe()
+                # Only the displayed statistics, without describe()'s full quantile sort
+                known_prices = prices[~np.isnan(prices)]
                 
                 # Display metrics
-                st.metric("Average Price", f"£{price_stats['mean']:.2f}")
-                st.metric("Median Price", f"£{price_stats['50%']:.2f}")
-                st.metric("Min Price", f"£{price_stats['min']:.2f}")
-                st.metric("Max Price", f"£{price_stats['max']:.2f}")
-                st.metric("Standard Deviation", f"£{price_stats['std']:.2f}")
+                if known_prices.size:
+                    st.metric("Average Price", f"£{known_prices.mean():.2f}")
+                    st.metric("Median Price", f"£{np.median(known_prices):.2f}")
+                    st.metric("Min Price", f"£{known_prices.min():.2f}")
+                    st.metric("Max Price", f"£{known_prices.max():.2f}")
+                    st.metric("Standard Deviation", f"£{known_prices.std(ddof=1):.2f}")
+                else:
+                    st.warning("⚠️ No listing prices available")
             
             # Price by neighborhood (if available)
             if 'neighbourhood' in listings.columns:
                 st.subheader("🏘️ Price by Neighborhood")
                 
-                neighborhood_prices = listings.groupby('neighbourhood')['price'].agg(['mean', 'count']).reset_index()
-                neighborhood_prices = neighborhood_prices[neighborhood_prices['count'] >= 5]
-                neighborhood_prices = neighborhood_prices.sort_values('mean', ascending=False).head(15)
-                
-                fig, ax = plt.subplots(figsize=(12, 8))
-                bars = ax.bar(range(len(neighborhood_prices)), neighborhood_prices['mean'], color='#FF5A5F', alpha=0.7)
-                ax.set_xticks(range(len(neighborhood_prices)))
-                ax.set_xticklabels(neighborhood_prices['neighbourhood'], rotation=45, ha='right')
-                ax.set_ylabel('Average Price (£)')
-                ax.set_title('Average Price by Neighborhood (Top 15)')
-                ax.grid(True, alpha=0.3)
-                
-                # Add value labels on bars
-                for i, bar in enumerate(bars):
-                    height = bar.get_height()
-                    ax.text(bar.get_x() + bar.get_width()/2., height + 1,
-                           f'£{height:.0f}', ha='center', va='bottom', fontsize=8)
+                neighborhood_prices = listings.groupby('neighbourhood', observed=True, sort=False, as_index=False).agg(
+                    avg_price=('price', 'mean'),
+                    listing_count=('price', 'count')
+                )
+                neighborhood_prices = neighborhood_prices[neighborhood_prices['listing_count'] >= 5]
+                neighborhood_prices = neighborhood_prices.nlargest(15, 'avg_price')
                 
-                plt.tight_layout()
-                st.pyplot(fig)
+                if PLOTLY_AVAILABLE:
+                    fig = px.bar(
+                        neighborhood_prices,
+                        x='neighbourhood',
+                        y='avg_price',
+                        title='Average Price by Neighborhood (Top 15)',
+                        labels={'avg_price': 'Average Price (£)', 'neighbourhood': 'Neighborhood'},
+                        color_discrete_sequence=['#FF5A5F']
+                    )
+                    fig.update_traces(texttemplate='£%{y:.0f}', textposition='outside')
+                    fig.update_xaxes(tickangle=45)
+                    st.plotly_chart(fig, use_container_width=True)
+                else:
+                    fig, ax = plt.subplots(figsize=(12, 8))
+                    bars = ax.bar(range(len(neighborhood_prices)), neighborhood_prices['avg_price'], color='#FF5A5F', alpha=0.7)
+                    ax.set_xticks(range(len(neighborhood_prices)))
+                    ax.set_xticklabels(neighborhood_prices['neighbourhood'], rotation=45, ha='right')
+                    ax.set_ylabel('Average Price (£)')
+                    ax.set_title('Average Price by Neighborhood (Top 15)')
+                    ax.grid(True, alpha=0.3)
+                    
+                    # Add value labels on bars
+                    for i, bar in enumerate(bars):
+                        height = bar.get_height()
+                        ax.text(bar.get_x() + bar.get_width()/2., height + 1,
+                               f'£{height:.0f}', ha='center', va='bottom', fontsize=8)
+                    
+                    plt.tight_layout()
+                    st.pyplot(fig)
         else:
             st.warning("⚠️ Price column not found in listings data")
     else:
@@ -239,7 +332,11 @@ elif analysis_type == "Basic Charts":
         if 'host_name' in listings.columns:
             st.subheader("👥 Top Hosts")
             
-            top_hosts = listings['host_name'].value_counts().head(10)
+            # Count listings per host code and pick the top 10 with a partial sort
+            host_codes = listings['host_name'].cat.codes.to_numpy()
+            host_counts = np.bincount(host_codes[host_codes >= 0], minlength=len(listings['host_name'].cat.categories))
+            top = top_k(host_counts, 10)
+            top_hosts = pd.Series(host_counts[top], index=listings['host_name'].cat.categories[top])
             
             fig, ax = plt.subplots(figsize=(12, 6))
             bars = ax.bar(range(len(top_hosts)), top_hosts.values, color='#00A699', alpha=0.7)
@@ -290,13 +387,13 @@ elif analysis_type == "Data Explorer":
                 
                 with col1:
                     # Histogram
-                    fig, ax = plt.subplots(figsize=(10, 6))
-                    ax.hist(df[selected_column].dropna(), bins=30, alpha=0.7, color='#FF5A5F')
-                    ax.set_xlabel(selected_column)
-                    ax.set_ylabel('Frequency')
-                    ax.set_title(f'Distribution of {selected_column}')
-                    ax.grid(True, alpha=0.3)
-                    st.pyplot(fig)
+                    plot_histogram(
+                        df[selected_column].to_numpy(dtype='float64', na_value=np.nan),
+                        bins=30,
+                        title=f'Distribution of {selected_column}',
+                        xlabel=selected_column,
+                        ylabel='Frequency'
+                    )
                 
                 with col2:
                     # Statistics
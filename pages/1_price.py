@@ -1,12 +1,13 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import re
 import os
-from pathlib import Path
 
 # Handle plotly import with fallback
 try:
     import plotly.express as px
+    import plotly.graph_objects as go
     PLOTLY_AVAILABLE = True
 except ImportError:
     PLOTLY_AVAILABLE = False
@@ -20,26 +21,61 @@ st.set_page_config(
 )
 
 # ------------------ LOAD DATA ------------------
+from utils.data import load_data, join_detailed, neighborhood_stats, top_k
+
+@st.cache_data
+def scatter_sample(_merged, columns, n, seed=42):
+    """Fixed random subset of rows, gathered in their original order"""
+    # Keyed on the joined columns instead of hashing the joined frame on every rerun
+    if len(_merged) <= n:
+        return _merged
+    rng = np.random.default_rng(seed)
+    return _merged.take(np.sort(rng.choice(len(_merged), n, replace=False)))
+
 @st.cache_data
-def load_data():
-    """Load datasets with proper error handling"""
-    data_dir = Path("Data")
+def box_stats(_listings, by, groups=None):
+    """Quartiles, whiskers and outlying prices per group, keyed on the grouping rather than the frame"""
+    frame = _listings if groups is None else _listings[_listings[by].isin(groups)]
+    stats = frame.groupby(by, observed=True)['price'].quantile([0.25, 0.5, 0.75]).unstack()
+    stats.columns = ['q1', 'median', 'q3']
     
-    if not data_dir.exists():
-        st.error("❌ Data directory not found!")
-        return None, None, None, None, None
+    # Whiskers end at the most extreme price inside the 1.5 IQR bounds, as px.box draws them
+    iqr = stats['q3'] - stats['q1']
+    low = (stats['q1'] - 1.5 * iqr).reindex(frame[by]).to_numpy()
+    high = (stats['q3'] + 1.5 * iqr).reindex(frame[by]).to_numpy()
+    prices = frame['price'].to_numpy()
+    inside = (prices >= low) & (prices <= high)
+    inside_prices = frame.loc[inside].groupby(by, observed=True)['price']
+    stats['lowerfence'] = inside_prices.min()
+    stats['upperfence'] = inside_prices.max()
     
-    try:
-        listings = pd.read_csv(data_dir / "listings.csv")
-        detailed_listings = pd.read_csv(data_dir / "listings-2.csv")
-        reviews = pd.read_csv(data_dir / "reviews-2.csv").sample(min(2000, len(pd.read_csv(data_dir / "reviews-2.csv"))), random_state=42)
-        calendar = pd.read_csv(data_dir / "calendar.csv")
-        return listings, detailed_listings, reviews, calendar, None
-    except Exception as e:
-        st.error(f"❌ Error loading data: {e}")
-        return None, None, None, None, None
-
-listings, detailed_listings, reviews, calendar, geo_json = load_data()
+    outside = ~inside & ~np.isnan(prices)
+    outliers = pd.Series(prices[outside], index=frame[by].to_numpy()[outside].astype(str))
+    return stats, outliers
+
+def price_box(box, title, xlabel):
+    """Box plot drawn from precomputed quartiles plus the outlying prices, instead of every raw price"""
+    stats, outliers = box
+    fig = go.Figure([
+        go.Box(
+            x=stats.index.astype(str).tolist(),
+            q1=stats['q1'].tolist(),
+            median=stats['median'].tolist(),
+            q3=stats['q3'].tolist(),
+            lowerfence=stats['lowerfence'].tolist(),
+            upperfence=stats['upperfence'].tolist()
+        ),
+        go.Scatter(x=outliers.index.tolist(), y=outliers.tolist(), mode='markers', marker={'size': 4})
+    ])
+    fig.update_layout(title=title, xaxis_title=xlabel, yaxis_title='Price (£)', showlegend=False)
+    return fig
+
+@st.cache_data
+def host_stats(_listings):
+    """Listing count and average price per host, computed once for the shared listings"""
+    return _listings.groupby('host_name', observed=True, sort=False)['price'].agg(['size', 'mean'])
+
+listings, detailed_listings = load_data()
 
 if listings is None:
     st.stop()
@@ -72,25 +108,28 @@ st.markdown("Explore pricing patterns and trends in Airbnb listings")
 if analysis_type == "Price Distribution":
     st.header("📊 Price Distribution Analysis")
     
+    prices = listings['price'].dropna().to_numpy(dtype=np.float64)
     col1, col2 = st.columns(2)
     
     with col1:
-        # Price histogram
+        # Price histogram, binned on the server so only 50 bars are sent to the browser
+        counts, edges = np.histogram(prices, bins=50)
+        
         if PLOTLY_AVAILABLE:
-            fig_hist = px.histogram(
-                listings, 
-                x='price', 
-                nbins=50,
+            fig_hist = px.bar(
+                x=0.5 * (edges[:-1] + edges[1:]),
+                y=counts,
                 title="Distribution of Listing Prices",
-                labels={'price': 'Price (£)', 'count': 'Number of Listings'}
+                labels={'x': 'Price (£)', 'y': 'Number of Listings'}
             )
-            fig_hist.update_layout(showlegend=False)
+            fig_hist.update_traces(width=np.diff(edges))
+            fig_hist.update_layout(showlegend=False, bargap=0)
             st.plotly_chart(fig_hist, use_container_width=True)
         else:
             # Fallback to matplotlib
             import matplotlib.pyplot as plt
             fig, ax = plt.subplots()
-            ax.hist(listings['price'], bins=50, alpha=0.7)
+            ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', alpha=0.7)
             ax.set_xlabel('Price (£)')
             ax.set_ylabel('Number of Listings')
             ax.set_title('Distribution of Listing Prices')
@@ -99,32 +138,33 @@ if analysis_type == "Price Distribution":
     with col2:
         # Price statistics
         st.markdown("### 📈 Price Statistics")
-        price_stats = listings['price'].describe()
-        
-        col_a, col_b = st.columns(2)
-        with col_a:
-            st.metric("Average Price", f"£{price_stats['mean']:.2f}")
-            st.metric("Median Price", f"£{price_stats['50%']:.2f}")
-        with col_b:
-            st.metric("Min Price", f"£{price_stats['min']:.2f}")
-            st.metric("Max Price", f"£{price_stats['max']:.2f}")
+        if prices.size:
+            col_a, col_b = st.columns(2)
+            with col_a:
+                st.metric("Average Price", f"£{prices.mean():.2f}")
+                st.metric("Median Price", f"£{np.median(prices):.2f}")
+            with col_b:
+                st.metric("Min Price", f"£{prices.min():.2f}")
+                st.metric("Max Price", f"£{prices.max():.2f}")
+        else:
+            st.warning("⚠️ No listing prices available")
 
 # ------------------ NEIGHBORHOOD COMPARISON ------------------
 elif analysis_type == "Neighborhood Comparison":
     st.header("🏘️ Price by Neighborhood")
     
     # Top neighborhoods by average price
-    neighborhood_prices = listings.groupby('neighbourhood')['price'].agg(['mean', 'count']).reset_index()
-    neighborhood_prices = neighborhood_prices[neighborhood_prices['count'] >= 10]  # Filter neighborhoods with at least 10 listings
-    neighborhood_prices = neighborhood_prices.sort_values('mean', ascending=False).head(15)
+    neighborhood_prices = neighborhood_stats(listings)
+    neighborhood_prices = neighborhood_prices[neighborhood_prices['listing_count'] >= 10]  # Filter neighborhoods with at least 10 listings
+    neighborhood_prices = neighborhood_prices.nlargest(15, 'avg_price')
     
     if PLOTLY_AVAILABLE:
         fig_bar = px.bar(
             neighborhood_prices,
             x='neighbourhood',
-            y='mean',
+            y='avg_price',
             title="Average Price by Neighborhood (Top 15)",
-            labels={'mean': 'Average Price (£)', 'neighbourhood': 'Neighborhood'}
+            labels={'avg_price': 'Average Price (£)', 'neighbourhood': 'Neighborhood'}
         )
         fig_bar.update_xaxes(tickangle=45)
         st.plotly_chart(fig_bar, use_container_width=True)
@@ -132,7 +172,7 @@ elif analysis_type == "Neighborhood Comparison":
         # Fallback to matplotlib
         import matplotlib.pyplot as plt
         fig, ax = plt.subplots(figsize=(12, 6))
-        ax.bar(range(len(neighborhood_prices)), neighborhood_prices['mean'])
+        ax.bar(range(len(neighborhood_prices)), neighborhood_prices['avg_price'])
         ax.set_xticks(range(len(neighborhood_prices)))
         ax.set_xticklabels(neighborhood_prices['neighbourhood'], rotation=45, ha='right')
         ax.set_ylabel('Average Price (£)')
@@ -141,15 +181,10 @@ elif analysis_type == "Neighborhood Comparison":
         st.pyplot(fig)
     
     # Box plot for price distribution by neighborhood
-    top_neighborhoods = neighborhood_prices.head(10)['neighbourhood'].tolist()
-    filtered_listings = listings[listings['neighbourhood'].isin(top_neighborhoods)]
+    top_neighborhoods = tuple(neighborhood_prices.head(10)['neighbourhood'])
+    top_box = box_stats(listings, 'neighbourhood', top_neighborhoods)
     
-    fig_box = px.box(
-        filtered_listings,
-        x='neighbourhood',
-        y='price',
-        title="Price Distribution by Neighborhood (Top 10)"
-    )
+    fig_box = price_box(top_box, "Price Distribution by Neighborhood (Top 10)", 'Neighborhood')
     fig_box.update_xaxes(tickangle=45)
     st.plotly_chart(fig_box, use_container_width=True)
 
@@ -157,8 +192,9 @@ elif analysis_type == "Neighborhood Comparison":
 elif analysis_type == "Host Price Trends":
     st.header("👥 Host Price Analysis")
     
-    # Top hosts by number of listings
-    top_hosts = listings['host_name'].value_counts().head(10)
+    # One grouped pass gives listing counts and average price per host
+    host_table = host_stats(listings)
+    top_hosts = host_table['size'].iloc[top_k(host_table['size'].to_numpy(), 10)]
     
     col1, col2 = st.columns(2)
     
@@ -174,7 +210,7 @@ elif analysis_type == "Host Price Trends":
     
     with col2:
         # Average price by top hosts
-        host_prices = listings[listings['host_name'].isin(top_hosts.index)].groupby('host_name')['price'].mean().sort_values(ascending=False)
+        host_prices = host_table.loc[top_hosts.index, 'mean'].sort_values(ascending=False)
         
         fig_host_prices = px.bar(
             x=host_prices.index,
@@ -194,17 +230,12 @@ elif analysis_type == "Price vs Features":
         
         with col1:
             # Price by room type
-            fig_room = px.box(
-                listings,
-                x='room_type',
-                y='price',
-                title="Price Distribution by Room Type"
-            )
+            fig_room = price_box(box_stats(listings, 'room_type'), "Price Distribution by Room Type", 'Room Type')
             st.plotly_chart(fig_room, use_container_width=True)
         
         with col2:
             # Average price by room type
-            room_prices = listings.groupby('room_type')['price'].mean().sort_values(ascending=False)
+            room_prices = listings.groupby('room_type', observed=True, sort=False)['price'].mean().sort_values(ascending=False)
             fig_room_avg = px.bar(
                 x=room_prices.index,
                 y=room_prices.values,
@@ -217,15 +248,16 @@ elif analysis_type == "Price vs Features":
     if detailed_listings is not None and not detailed_listings.empty:
         st.subheader("📋 Detailed Property Analysis")
         
-        # Merge with detailed data
-        merged_data = pd.merge(listings, detailed_listings, on='id', how='inner')
+        # Join only the detailed column this chart needs
+        detail_columns = ('accommodates',)
+        merged_data = join_detailed(listings, detailed_listings, detail_columns)
         
         if 'accommodates' in merged_data.columns:
             fig_scatter = px.scatter(
-                merged_data.sample(1000) if len(merged_data) > 1000 else merged_data,
+                scatter_sample(merged_data, detail_columns, 1000),
                 x='accommodates',
-                y='price_x',
+                y='price',
                 title="Price vs Number of Guests Accommodated",
-                labels={'accommodates': 'Number of Guests', 'price_x': 'Price (£)'}
+                labels={'accommodates': 'Number of Guests', 'price': 'Price (£)'}
             )
             st.plotly_chart(fig_scatter, use_container_width=True)
@@ -8,13 +8,12 @@ st.set_page_config(
 
 # ------------------ IMPORTS ------------------
 import pandas as pd
-import json
-from pathlib import Path
+import numpy as np
 
 # Handle optional imports
 try:
     import folium
-    from folium.plugins import MarkerCluster, HeatMap
+    from folium.plugins import FastMarkerCluster, HeatMap
     from streamlit_folium import st_folium
     FOLIUM_AVAILABLE = True
 except ImportError:
@@ -22,38 +21,43 @@ except ImportError:
     st.error("❌ Folium not available. Please install it with: pip install folium streamlit-folium")
     st.stop()
 
+try:
+    import pydeck as pdk
+    PYDECK_AVAILABLE = True
+except ImportError:
+    PYDECK_AVAILABLE = False
+
 # ------------------ LOAD DATA ------------------
-@st.cache_data
-def load_data():
-    """Load datasets with proper error handling"""
-    data_dir = Path("Data")
-    
-    if not data_dir.exists():
-        st.error("❌ Data directory not found!")
-        return None, None, None, None, None
+from utils.data import load_data, load_geo_json, join_detailed, neighborhood_stats
+
+def circle_marker_layer(lats, lons, colors, popups, radius, fill_opacity=0.2):
+    """Build one GeoJson layer of circle markers instead of a folium object per point"""
+    features = [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+            'properties': {'color': color, 'popup': popup}
+        }
+        for lat, lon, color, popup in zip(lats.tolist(), lons.tolist(), colors.tolist(), popups.tolist())
+    ]
     
-    try:
-        listings = pd.read_csv(data_dir / "listings.csv")
-        detailed_listings = pd.read_csv(data_dir / "listings-2.csv")
-        reviews = pd.read_csv(data_dir / "reviews-2.csv").sample(min(2000, len(pd.read_csv(data_dir / "reviews-2.csv"))), random_state=42)
-        calendar = pd.read_csv(data_dir / "calendar.csv")
-        
-        # Try to load GeoJSON
-        geo_json = None
-        geo_path = data_dir / "neighbourhoods.geojson"
-        if geo_path.exists():
-            try:
-                import geopandas as gpd
-                geo_json = gpd.read_file(geo_path)
-            except ImportError:
-                st.warning("⚠️ GeoPandas not available. Some map features will be limited.")
-        
-        return listings, detailed_listings, reviews, calendar, geo_json
-    except Exception as e:
-        st.error(f"❌ Error loading data: {e}")
-        return None, None, None, None, None
+    return folium.GeoJson(
+        {'type': 'FeatureCollection', 'features': features},
+        marker=folium.CircleMarker(radius=radius, fill=True),
+        style_function=lambda feature: {
+            'color': feature['properties']['color'],
+            'fillColor': feature['properties']['color'],
+            'fillOpacity': fill_opacity
+        },
+        popup=folium.GeoJsonPopup(fields=['popup'], labels=False)
+    )
+
+def price_window(prices, lo, hi):
+    """Row range of a price-sorted array whose values fall within [lo, hi]"""
+    return int(np.searchsorted(prices, lo, side='left')), int(np.searchsorted(prices, hi, side='right'))
 
-listings, detailed_listings, reviews, calendar, geo_json = load_data()
+listings, detailed_listings = load_data()
+geo_json = load_geo_json()
 
 if listings is None:
     st.stop()
@@ -86,10 +90,8 @@ price_range = st.sidebar.slider(
 )
 
 # Filter data based on price range
-filtered_listings = listings[
-    (listings['price'] >= price_range[0]) & 
-    (listings['price'] <= price_range[1])
-]
+start, stop = price_window(listings['price'].to_numpy(), *price_range)
+filtered_listings = listings.iloc[start:stop]
 
 # ------------------ TITLE ------------------
 st.title("🗺️ Interactive Maps Dashboard")
@@ -110,40 +112,56 @@ st.markdown("---")
 if map_type == "Listings Overview":
     st.header("📍 Airbnb Listings Overview")
     
-    # Create base map
-    center_lat = filtered_listings['latitude'].mean()
-    center_lon = filtered_listings['longitude'].mean()
-    
-    m = folium.Map(location=[center_lat, center_lon], zoom_start=11)
+    center_lat, center_lon = filtered_listings[['latitude', 'longitude']].mean().tolist()
     
-    # Add marker cluster
-    marker_cluster = MarkerCluster().add_to(m)
+    # Build popup text for every listing in one pass over Arrow-backed strings
+    def as_text(col):
+        return filtered_listings[col].astype('string[pyarrow]')
     
-    # Sample data for performance if too many listings
-    sample_size = min(1000, len(filtered_listings))
-    sample_listings = filtered_listings.sample(sample_size) if len(filtered_listings) > sample_size else filtered_listings
+    room_types = as_text('room_type') if 'room_type' in filtered_listings.columns else 'N/A'
+    prices = filtered_listings['price'].round().astype('int32').astype('string[pyarrow]')
+    popups = (
+        "<b>" + as_text('name').fillna('').str.slice(0, 50) + "...</b><br>"
+        + "Host: " + as_text('host_name').fillna('N/A') + "<br>"
+        + "Price: £" + prices + "<br>"
+        + "Room Type: " + room_types + "<br>"
+        + "Neighborhood: " + as_text('neighbourhood')
+    )
     
-    for _, row in sample_listings.iterrows():
-        popup_text = f"""
-        <b>{row['name'][:50]}...</b><br>
-        Host: {row['host_name']}<br>
-        Price: £{row['price']:.0f}<br>
-        Room Type: {row.get('room_type', 'N/A')}<br>
-        Neighborhood: {row['neighbourhood']}
+    if PYDECK_AVAILABLE:
+        # WebGL scatter layer: every listing is drawn on the GPU in one pass
+        deck_data = filtered_listings[['longitude', 'latitude']].assign(
+            popup=popups,
+            shade=(90 - filtered_listings['price'] / 10).clip(0, 90).fillna(90).astype('uint8')
+        )
+        layer = pdk.Layer(
+            'ScatterplotLayer',
+            data=deck_data,
+            get_position='[longitude, latitude]',
+            get_radius=30,
+            get_fill_color='[255, shade, 95]',
+            pickable=True
+        )
+        view = pdk.ViewState(latitude=center_lat, longitude=center_lon, zoom=11)
+        st.pydeck_chart(pdk.Deck(layers=[layer], initial_view_state=view, tooltip={'html': '{popup}'}))
+    else:
+        m = folium.Map(location=[center_lat, center_lon], zoom_start=11)
+        
+        # Markers are created client-side from a single [lat, lon, popup] array
+        marker_callback = """
+        function (row) {
+            var icon = L.AwesomeMarkers.icon({icon: 'home', markerColor: 'red', prefix: 'glyphicon'});
+            var marker = L.marker(new L.LatLng(row[0], row[1]), {icon: icon});
+            marker.bindPopup(row[2], {maxWidth: 300});
+            return marker;
+        };
         """
+        marker_data = filtered_listings[['latitude', 'longitude']].assign(popup=popups).to_numpy().tolist()
+        FastMarkerCluster(data=marker_data, callback=marker_callback).add_to(m)
         
-        folium.Marker(
-            location=[row['latitude'], row['longitude']],
-            popup=folium.Popup(popup_text, max_width=300),
-            icon=folium.Icon(color='red', icon='home')
-        ).add_to(marker_cluster)
-    
-    st.markdown('<div class="map-container">', unsafe_allow_html=True)
-    st_folium(m, width=700, height=500)
-    st.markdown('</div>', unsafe_allow_html=True)
-    
-    if sample_size < len(filtered_listings):
-        st.info(f"📊 Showing {sample_size:,} out of {len(filtered_listings):,} listings for performance")
+        st.markdown('<div class="map-container">', unsafe_allow_html=True)
+        st_folium(m, width=700, height=500)
+        st.markdown('</div>', unsafe_allow_html=True)
 
 # ------------------ PRICE HEATMAP ------------------
 elif map_type == "Price Heatmap":
@@ -152,14 +170,12 @@ elif map_type == "Price Heatmap":
     # HeatMap already imported above
     
     # Create base map
-    center_lat = filtered_listings['latitude'].mean()
-    center_lon = filtered_listings['longitude'].mean()
+    center_lat, center_lon = filtered_listings[['latitude', 'longitude']].mean().tolist()
     
     m = folium.Map(location=[center_lat, center_lon], zoom_start=11)
     
     # Prepare heat map data
-    heat_data = [[row['latitude'], row['longitude'], row['price']] 
-                 for idx, row in filtered_listings.iterrows()]
+    heat_data = filtered_listings[['latitude', 'longitude', 'price']].to_numpy(dtype=np.float32).tolist()
     
     # Add heat map
     HeatMap(heat_data, radius=15, blur=10, gradient={0.2: 'blue', 0.4: 'lime', 0.6: 'orange', 1: 'red'}).add_to(m)
@@ -176,25 +192,17 @@ elif map_type == "Neighborhood Analysis":
     
     if geo_json is not None:
         # Calculate neighborhood statistics
-        neighborhood_stats = filtered_listings.groupby('neighbourhood').agg({
-            'price': ['mean', 'count'],
-            'latitude': 'mean',
-            'longitude': 'mean'
-        }).round(2)
-        
-        neighborhood_stats.columns = ['avg_price', 'listing_count', 'lat', 'lon']
-        neighborhood_stats = neighborhood_stats.reset_index()
+        neighborhood_table = neighborhood_stats(listings, start, stop)
         
         # Create choropleth map
-        center_lat = filtered_listings['latitude'].mean()
-        center_lon = filtered_listings['longitude'].mean()
+        center_lat, center_lon = filtered_listings[['latitude', 'longitude']].mean().tolist()
         
         m = folium.Map(location=[center_lat, center_lon], zoom_start=11)
         
         try:
             folium.Choropleth(
                 geo_data=geo_json,
-                data=neighborhood_stats,
+                data=neighborhood_table,
                 columns=['neighbourhood', 'avg_price'],
                 key_on='feature.properties.neighbourhood',
                 fill_color='YlOrRd',
@@ -211,34 +219,31 @@ elif map_type == "Neighborhood Analysis":
         
         # Show top neighborhoods
         st.subheader("🏆 Top Neighborhoods by Average Price")
-        top_neighborhoods = neighborhood_stats.nlargest(10, 'avg_price')[['neighbourhood', 'avg_price', 'listing_count']]
-        st.dataframe(top_neighborhoods, use_container_width=True)
+        top_neighborhoods = neighborhood_table.nlargest(10, 'avg_price')[['neighbourhood', 'avg_price', 'listing_count']]
+        st.dataframe(top_neighborhoods.round(2), use_container_width=True)
     else:
         st.warning("⚠️ Neighborhood boundaries data not available. Showing point map instead.")
         
         # Fallback to point map
-        center_lat = filtered_listings['latitude'].mean()
-        center_lon = filtered_listings['longitude'].mean()
+        center_lat, center_lon = filtered_listings[['latitude', 'longitude']].mean().tolist()
         
         m = folium.Map(location=[center_lat, center_lon], zoom_start=11)
         
         # Color code by neighborhood
-        neighborhoods = filtered_listings['neighbourhood'].unique()
+        neighborhoods = filtered_listings['neighbourhood'].unique()[:10]  # Limit to 10 for visibility
         colors = ['red', 'blue', 'green', 'purple', 'orange', 'darkred', 'lightred', 'beige', 'darkblue', 'darkgreen']
         
-        for i, neighborhood in enumerate(neighborhoods[:10]):  # Limit to 10 for visibility
-            neighborhood_data = filtered_listings[filtered_listings['neighbourhood'] == neighborhood]
-            color = colors[i % len(colors)]
-            
-            for _, row in neighborhood_data.iterrows():
-                folium.CircleMarker(
-                    location=[row['latitude'], row['longitude']],
-                    radius=5,
-                    popup=f"{neighborhood}<br>£{row['price']:.0f}",
-                    color=color,
-                    fill=True,
-                    fillColor=color
-                ).add_to(m)
+        shown = filtered_listings[filtered_listings['neighbourhood'].isin(neighborhoods)]
+        point_colors = shown['neighbourhood'].map(dict(zip(neighborhoods, colors))).astype(str)
+        popups = shown['neighbourhood'].astype(str) + "<br>£" + shown['price'].round().astype('int32').astype(str)
+        
+        circle_marker_layer(
+            shown['latitude'].to_numpy(),
+            shown['longitude'].to_numpy(),
+            point_colors.to_numpy(),
+            popups.to_numpy(),
+            radius=5
+        ).add_to(m)
         
         st.markdown('<div class="map-container">', unsafe_allow_html=True)
         st_folium(m, width=700, height=500)
@@ -249,40 +254,35 @@ elif map_type == "Review Scores":
     st.header("⭐ Review Scores Analysis")
     
     if detailed_listings is not None and not detailed_listings.empty:
-        # Merge with detailed data
-        merged_data = pd.merge(filtered_listings, detailed_listings, on='id', how='inner')
+        # Join the review scores once, then apply the price filter to the joined slice
+        merged_data = join_detailed(listings, detailed_listings, ('review_scores_rating',))
+        merged_data = merged_data[merged_data['price'].between(*price_range)]
         
         if 'review_scores_rating' in merged_data.columns:
             # Filter out listings without review scores
             review_data = merged_data.dropna(subset=['review_scores_rating'])
             
             if not review_data.empty:
-                center_lat = review_data['latitude'].mean()
-                center_lon = review_data['longitude'].mean()
+                center_lat, center_lon = review_data[['latitude', 'longitude']].mean().tolist()
                 
                 m = folium.Map(location=[center_lat, center_lon], zoom_start=11)
                 
-                # Color code by review score
-                for _, row in review_data.iterrows():
-                    score = row['review_scores_rating']
-                    
-                    # Determine color based on score
-                    if score >= 4.5:
-                        color = 'green'
-                    elif score >= 4.0:
-                        color = 'orange'
-                    else:
-                        color = 'red'
-                    
-                    folium.CircleMarker(
-                        location=[row['latitude'], row['longitude']],
-                        radius=6,
-                        popup=f"Rating: {score:.1f}/5<br>Price: £{row['price_x']:.0f}",
-                        color=color,
-                        fill=True,
-                        fillColor=color,
-                        fillOpacity=0.7
-                    ).add_to(m)
+                # Color code by review score, computed for all listings at once
+                scores = review_data['review_scores_rating'].to_numpy()
+                colors = np.array(['red', 'orange', 'green'])[np.digitize(scores, [4.0, 4.5])]
+                
+                ratings = pd.Series(np.char.mod('%.1f', scores), index=review_data.index)
+                prices = review_data['price'].round().astype('int32').astype(str)
+                popups = ("Rating: " + ratings + "/5<br>Price: £" + prices).to_numpy()
+                
+                circle_marker_layer(
+                    review_data['latitude'].to_numpy(),
+                    review_data['longitude'].to_numpy(),
+                    colors,
+                    popups,
+                    radius=6,
+                    fill_opacity=0.7
+                ).add_to(m)
                 
                 st.markdown('<div class="map-container">', unsafe_allow_html=True)
                 st_folium(m, width=700, height=500)
@@ -1,10 +1,21 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 import matplotlib.pyplot as plt
 from pathlib import Path
-import plotly.express as px
+import io
+from utils.data import sample_csv_rows
 import re
 
+# Handle plotly import with fallback
+try:
+    import plotly.express as px
+    PLOTLY_AVAILABLE = True
+except ImportError:
+    PLOTLY_AVAILABLE = False
+
 # ----------------- PAGE CONFIG -----------------
 st.set_page_config(
     page_title="📝 Text Analysis",
@@ -28,32 +39,143 @@ def load_data():
         reviews_path = data_dir / "reviews-2.csv"
         
         if translated_path.exists():
-            reviews = pd.read_csv(translated_path)
-            text_column = "translated_text"
+            source_path, text_column = translated_path, "translated_text"
         elif reviews_path.exists():
-            reviews = pd.read_csv(reviews_path)
-            text_column = "comments"
+            source_path, text_column = reviews_path, "comments"
         else:
             st.error("❌ No review files found!")
             return None, None
         
-        # Sample for performance
-        if len(reviews) > 5000:
-            reviews = reviews.sample(5000, random_state=42)
+        # Stream the CSV, dropping empty and very short reviews in Arrow, and keep a 5000-row sample
+        reviews = sample_csv_rows(
+            source_path,
+            5000,
+            columns=[text_column],
+            column_types={text_column: pa.string()},
+            row_filter=lambda batch: pc.greater(pc.utf8_length(batch.column(text_column)), 10),
+            types_mapper={pa.string(): pd.StringDtype('pyarrow')}.get
+        )
         
         return reviews, text_column
     except Exception as e:
         st.error(f"❌ Error loading data: {e}")
         return None, None
 
+# ----------------- TOKENIZATION -----------------
+# Compiled once per process instead of on every rerun
+# WordCloud's token regex at its default min_word_length, so single characters are kept too
+WORD_PATTERN = re.compile(r"\w[\w']*")
+NON_LETTER_PATTERN = re.compile(r'[^a-z\s]+')
+# Runs of anything str.split() would not split on; RE2's \s alone only covers ASCII whitespace
+SPLIT_WORD_PATTERN = r'[^\s\x{0b}\x{1c}-\x{1f}\x{85}\x{a0}\x{1680}\x{2000}-\x{200a}\x{2028}\x{2029}\x{202f}\x{205f}\x{3000}]+'
+PHRASE_STOPWORDS = frozenset({'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'a', 'an', 'is', 'was', 'were', 'are', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'it', 'its', 'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'we', 'they', 'me', 'him', 'her', 'us', 'them'})
+WORDCLOUD_STOPWORDS = frozenset({'stay', 'great', 'good', 'get', 'would', 'london', 'little', 'really', 'well', 'one', 'place', 'time', 'nice'})
+
+# ----------------- SENTIMENT SCORING -----------------
+@st.cache_resource
+def sentiment_analyzer():
+    """TextBlob's default PatternAnalyzer, created once per process"""
+    from textblob.en.sentiments import PatternAnalyzer
+    
+    return PatternAnalyzer()
+
+@st.cache_data
+def score_sentiment(texts, _analyzer):
+    """TextBlob polarity and subjectivity for each distinct text, reused across reruns"""
+    # Same scores as TextBlob(text).sentiment without building a TextBlob per review
+    sentiments = [_analyzer.analyze(text) for text in texts]
+    return pd.DataFrame(sentiments, columns=['polarity', 'subjectivity'])
+
+# ----------------- CHARTS -----------------
+def binned_bar(values, bins, title, xlabel, weights=None):
+    """Bar chart of server-side histogram bins, so only the bar heights reach the browser"""
+    counts, edges = np.histogram(values, bins=bins, weights=weights)
+    
+    if PLOTLY_AVAILABLE:
+        fig = px.bar(
+            x=0.5 * (edges[:-1] + edges[1:]),
+            y=counts,
+            title=title,
+            labels={'x': xlabel, 'y': 'Count'}
+        )
+        fig.update_traces(width=np.diff(edges))
+        fig.update_layout(bargap=0)
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        # Fallback to matplotlib
+        fig, ax = plt.subplots()
+        ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', alpha=0.7)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel('Count')
+        ax.set_title(title)
+        st.pyplot(fig)
+
+def ranked_bar(frame, x, y, title):
+    """Bar chart of a ranked table with angled labels, falling back to matplotlib without plotly"""
+    if PLOTLY_AVAILABLE:
+        fig = px.bar(frame, x=x, y=y, title=title)
+        fig.update_xaxes(tickangle=45)
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        fig, ax = plt.subplots(figsize=(10, 6))
+        ax.bar(range(len(frame)), frame[y])
+        ax.set_xticks(range(len(frame)))
+        ax.set_xticklabels(frame[x], rotation=45, ha='right')
+        ax.set_ylabel(y)
+        ax.set_title(title)
+        plt.tight_layout()
+        st.pyplot(fig)
+
+@st.cache_resource
+def build_wordcloud(_review_counts, fingerprint):
+    """Word cloud of the distinct reviews weighted by their counts, keyed by a fingerprint of the sample"""
+    from wordcloud import WordCloud, STOPWORDS
+    
+    # Custom stopwords
+    custom_stopwords = STOPWORDS | WORDCLOUD_STOPWORDS
+    
+    # Count word frequencies in pandas instead of joining every review into one string
+    unique_reviews = _review_counts.index.to_series(index=range(len(_review_counts)))
+    tokens = unique_reviews.str.lower().str.findall(WORD_PATTERN).explode().dropna()
+    tokens = tokens.str.removesuffix("'s")
+    tokens = tokens[~tokens.isin(custom_stopwords) & ~tokens.str.isdigit()]
+    weights = pd.Series(_review_counts.to_numpy()[tokens.index], index=tokens.index)
+    word_frequencies = weights.groupby(tokens.to_numpy()).sum()
+    
+    # Fold plurals into their singular when both occur, as WordCloud's normalize_plurals does
+    words = word_frequencies.index
+    plurals = words[words.str.endswith('s') & ~words.str.endswith('ss')]
+    singulars = plurals.str[:-1]
+    folded = singulars.isin(words)
+    word_frequencies = word_frequencies.rename(dict(zip(plurals[folded], singulars[folded]))).groupby(level=0).sum()
+    
+    return WordCloud(
+        width=1200,
+        height=600,
+        background_color='white',
+        max_words=100,
+        colormap='viridis'
+    ).generate_from_frequencies(word_frequencies.to_dict())
+
+@st.cache_data
+def wordcloud_png(_wordcloud, fingerprint):
+    """Word cloud rendered once to PNG bytes, keyed by the same fingerprint as the layout"""
+    buffer = io.BytesIO()
+    _wordcloud.to_image().save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
 reviews, text_column = load_data()
 
 if reviews is None:
     st.stop()
 
-# Filter out empty reviews
-reviews = reviews.dropna(subset=[text_column])
-reviews = reviews[reviews[text_column].str.len() > 10]  # Remove very short reviews
+# Empty and very short reviews were already dropped while sampling
+
+# Character lengths from one Arrow UTF-8 pass, reused by the metric and histogram
+review_lengths = pc.utf8_length(pa.array(reviews[text_column])).to_numpy()
+
+# Canned reviews repeat often, so text is processed once per distinct review and weighted by its count
+review_counts = reviews[text_column].astype(str).value_counts()
 
 # ----------------- CUSTOM CSS -----------------
 st.markdown("""
@@ -84,7 +206,7 @@ col1, col2, col3 = st.columns(3)
 with col1:
     st.metric("📝 Total Reviews", f"{len(reviews):,}")
 with col2:
-    avg_length = reviews[text_column].str.len().mean()
+    avg_length = review_lengths.mean()
     st.metric("📏 Avg Review Length", f"{avg_length:.0f} chars")
 with col3:
     st.metric("📊 Text Column", text_column.replace('_', ' ').title())
@@ -99,41 +221,13 @@ if analysis_type == "Basic Statistics":
     
     with col1:
         # Review length distribution
-        try:
-            import plotly.express as px
-            PLOTLY_AVAILABLE = True
-        except ImportError:
-            PLOTLY_AVAILABLE = False
-        
-        review_lengths = reviews[text_column].str.len()
-        
-        if PLOTLY_AVAILABLE:
-            fig_hist = px.histogram(
-                x=review_lengths,
-                nbins=50,
-                title="Distribution of Review Lengths",
-                labels={'x': 'Review Length (characters)', 'y': 'Count'}
-            )
-            st.plotly_chart(fig_hist, use_container_width=True)
-        else:
-            # Fallback to matplotlib
-            fig, ax = plt.subplots()
-            ax.hist(review_lengths, bins=50, alpha=0.7)
-            ax.set_xlabel('Review Length (characters)')
-            ax.set_ylabel('Count')
-            ax.set_title('Distribution of Review Lengths')
-            st.pyplot(fig)
+        binned_bar(review_lengths, 50, "Distribution of Review Lengths", 'Review Length (characters)')
     
     with col2:
         # Word count distribution
-        word_counts = reviews[text_column].str.split().str.len()
-        fig_words = px.histogram(
-            x=word_counts,
-            nbins=50,
-            title="Distribution of Word Counts",
-            labels={'x': 'Word Count', 'y': 'Count'}
-        )
-        st.plotly_chart(fig_words, use_container_width=True)
+        # Count whitespace-separated words without materialising the split lists
+        word_counts = pc.count_substring_regex(pa.array(reviews[text_column]), SPLIT_WORD_PATTERN).to_numpy()
+        binned_bar(word_counts, 50, "Distribution of Word Counts", 'Word Count')
     
     # Sample reviews
     st.subheader("📝 Sample Reviews")
@@ -147,30 +241,12 @@ elif analysis_type == "Word Cloud":
     st.header("☁️ Word Cloud Analysis")
     
     try:
-        from wordcloud import WordCloud, STOPWORDS
-        
-        # Combine all text
-        all_text = ' '.join(reviews[text_column].astype(str))
+        # Laid out once per review sample and reused when returning to this view
+        fingerprint = int(pd.util.hash_pandas_object(review_counts).sum())
+        wordcloud = build_wordcloud(review_counts, fingerprint)
         
-        # Custom stopwords
-        custom_stopwords = set(STOPWORDS)
-        custom_stopwords.update(['stay', 'great', 'good', 'get', 'would', 'london', 'little', 'really', 'well', 'one', 'place', 'time', 'nice'])
-        
-        # Generate word cloud
-        wordcloud = WordCloud(
-            width=1200,
-            height=600,
-            background_color='white',
-            stopwords=custom_stopwords,
-            max_words=100,
-            colormap='viridis'
-        ).generate(all_text)
-        
-        # Display
-        fig, ax = plt.subplots(figsize=(15, 8))
-        ax.imshow(wordcloud, interpolation='bilinear')
-        ax.axis('off')
-        st.pyplot(fig)
+        # Display the cached PNG instead of redrawing a matplotlib figure
+        st.image(wordcloud_png(wordcloud, fingerprint), use_container_width=True)
         
         # Most common words
         st.subheader("🔤 Most Common Words")
@@ -178,14 +254,7 @@ elif analysis_type == "Word Cloud":
         top_words = list(word_freq.items())[:20]
         
         words_df = pd.DataFrame(top_words, columns=['Word', 'Frequency'])
-        fig_bar = px.bar(
-            words_df,
-            x='Word',
-            y='Frequency',
-            title="Top 20 Most Frequent Words"
-        )
-        fig_bar.update_xaxes(tickangle=45)
-        st.plotly_chart(fig_bar, use_container_width=True)
+        ranked_bar(words_df, 'Word', 'Frequency', "Top 20 Most Frequent Words")
         
     except ImportError:
         st.error("❌ WordCloud library not available. Please install it with: pip install wordcloud")
@@ -195,59 +264,47 @@ elif analysis_type == "Sentiment Analysis":
     st.header("😊 Sentiment Analysis")
     
     try:
-        from textblob import TextBlob
-        
         # Calculate sentiment for a sample of reviews
         sample_size = min(1000, len(reviews))
-        sample_reviews = reviews.sample(sample_size)[text_column]
+        # Seeded so reruns draw the same sample and reuse the cached scores
+        sample_reviews = reviews.sample(sample_size, random_state=42)[text_column]
         
         with st.spinner("Analyzing sentiment..."):
-            sentiments = []
-            for review in sample_reviews:
-                blob = TextBlob(str(review))
-                sentiments.append({
-                    'polarity': blob.sentiment.polarity,
-                    'subjectivity': blob.sentiment.subjectivity
-                })
+            sample_counts = sample_reviews.astype(str).value_counts()
+            unique_scores = score_sentiment(sample_counts.index.to_series(), sentiment_analyzer())
         
-        sentiment_df = pd.DataFrame(sentiments)
+        # Each distinct review is weighted by how often it occurs in the sample
+        polarity = unique_scores['polarity'].to_numpy()
+        weights = sample_counts.to_numpy()
+        total = weights.sum()
         
         col1, col2 = st.columns(2)
         
         with col1:
             # Sentiment distribution
-            fig_sentiment = px.histogram(
-                sentiment_df,
-                x='polarity',
-                nbins=30,
-                title="Sentiment Polarity Distribution",
-                labels={'polarity': 'Polarity (-1: Negative, 1: Positive)'}
+            binned_bar(
+                polarity, 30, "Sentiment Polarity Distribution", 'Polarity (-1: Negative, 1: Positive)', weights=weights
             )
-            st.plotly_chart(fig_sentiment, use_container_width=True)
         
         with col2:
             # Subjectivity distribution
-            fig_subj = px.histogram(
-                sentiment_df,
-                x='subjectivity',
-                nbins=30,
-                title="Subjectivity Distribution",
-                labels={'subjectivity': 'Subjectivity (0: Objective, 1: Subjective)'}
+            binned_bar(
+                unique_scores['subjectivity'].to_numpy(), 30, "Subjectivity Distribution",
+                'Subjectivity (0: Objective, 1: Subjective)', weights=weights
             )
-            st.plotly_chart(fig_subj, use_container_width=True)
         
         # Sentiment categories
-        positive = len(sentiment_df[sentiment_df['polarity'] > 0.1])
-        negative = len(sentiment_df[sentiment_df['polarity'] < -0.1])
-        neutral = len(sentiment_df) - positive - negative
+        positive = weights[polarity > 0.1].sum()
+        negative = weights[polarity < -0.1].sum()
+        neutral = total - positive - negative
         
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("😊 Positive Reviews", f"{positive} ({positive/len(sentiment_df)*100:.1f}%)")
+            st.metric("😊 Positive Reviews", f"{positive} ({positive/total*100:.1f}%)")
         with col2:
-            st.metric("😐 Neutral Reviews", f"{neutral} ({neutral/len(sentiment_df)*100:.1f}%)")
+            st.metric("😐 Neutral Reviews", f"{neutral} ({neutral/total*100:.1f}%)")
         with col3:
-            st.metric("😞 Negative Reviews", f"{negative} ({negative/len(sentiment_df)*100:.1f}%)")
+            st.metric("😞 Negative Reviews", f"{negative} ({negative/total*100:.1f}%)")
         
     except ImportError:
         st.error("❌ TextBlob library not available. Please install it with: pip install textblob")
@@ -257,54 +314,45 @@ elif analysis_type == "Common Phrases":
     st.header("🔍 Common Phrases Analysis")
     
     # Simple n-gram analysis
-    from collections import Counter
-    import re
     
-    # Clean and tokenize text
-    all_text = ' '.join(reviews[text_column].astype(str).str.lower())
+    # Tokenize each distinct review once and weight its words and pairs by how often it occurs
+    unique_reviews = review_counts.index.to_series(index=range(len(review_counts)))
     # Remove special characters and extra spaces
-    clean_text = re.sub(r'[^a-zA-Z\s]', '', all_text)
-    words = clean_text.split()
+    words = unique_reviews.str.lower().str.replace(NON_LETTER_PATTERN, '', regex=True).str.split().explode().dropna()
+    words = words[~words.isin(PHRASE_STOPWORDS) & (words.str.len() > 2)]
+    rows = words.index.to_numpy()
+    weights = review_counts.to_numpy()[rows]
     
-    # Remove common stop words
-    stop_words = {'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'a', 'an', 'is', 'was', 'were', 'are', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'it', 'its', 'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'we', 'they', 'me', 'him', 'her', 'us', 'them'}
-    filtered_words = [word for word in words if word not in stop_words and len(word) > 2]
+    # Count single words and adjacent pairs on the same integer word ids
+    vocabulary = pd.Categorical(words)
+    word_counts = np.bincount(vocabulary.codes, weights=weights, minlength=len(vocabulary.categories))
+    
+    # Pack each adjacent pair of word ids into one integer and count the pairs in NumPy
+    ids = vocabulary.codes.astype(np.uint64)
+    same_review = rows[1:] == rows[:-1]
+    pairs = ((ids[:-1] << np.uint64(32)) | ids[1:])[same_review]
+    unique_pairs, pair_index = np.unique(pairs, return_inverse=True)
+    pair_counts = np.bincount(pair_index, weights=weights[1:][same_review], minlength=len(unique_pairs))
     
     col1, col2 = st.columns(2)
     
     with col1:
         # Most common single words
         st.subheader("🔤 Most Common Words")
-        word_counts = Counter(filtered_words)
-        top_words = word_counts.most_common(20)
-        
-        words_df = pd.DataFrame(top_words, columns=['Word', 'Count'])
-        fig_words = px.bar(
-            words_df,
-            x='Word',
-            y='Count',
-            title="Top 20 Single Words"
-        )
-        fig_words.update_xaxes(tickangle=45)
-        st.plotly_chart(fig_words, use_container_width=True)
+        top_words = np.argsort(-word_counts, kind='stable')[:20]
+        words_df = pd.DataFrame({'Word': vocabulary.categories[top_words], 'Count': word_counts[top_words].astype(int)})
+        ranked_bar(words_df, 'Word', 'Count', "Top 20 Single Words")
     
     with col2:
         # Most common bigrams
         st.subheader("👥 Most Common Word Pairs")
-        bigrams = [f"{filtered_words[i]} {filtered_words[i+1]}" 
-                  for i in range(len(filtered_words)-1)]
-        bigram_counts = Counter(bigrams)
-        top_bigrams = bigram_counts.most_common(20)
+        top = np.argsort(-pair_counts, kind='stable')[:20]
+        first = vocabulary.categories[(unique_pairs[top] >> np.uint64(32)).astype(np.int64)]
+        second = vocabulary.categories[(unique_pairs[top] & np.uint64(0xFFFFFFFF)).astype(np.int64)]
+        top_bigrams = list(zip(first + ' ' + second, pair_counts[top].astype(int).tolist()))
         
         bigrams_df = pd.DataFrame(top_bigrams, columns=['Bigram', 'Count'])
-        fig_bigrams = px.bar(
-            bigrams_df,
-            x='Bigram',
-            y='Count',
-            title="Top 20 Word Pairs"
-        )
-        fig_bigrams.update_xaxes(tickangle=45)
-        st.plotly_chart(fig_bigrams, use_container_width=True)
+        ranked_bar(bigrams_df, 'Bigram', 'Count', "Top 20 Word Pairs")
     
     # Show some example phrases
     st.subheader("📝 Example Phrases")
@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 """Simple launcher for Airbnb Dashboard"""
 
+import importlib
 import subprocess
 import sys
 import os
 
+# Libraries app_simple.py imports at startup
+PREWARM_MODULES = ("numpy", "pandas", "pyarrow", "matplotlib.pyplot", "plotly.express", "plotly.graph_objects")
+
 def main():
     print("🏠 Starting Airbnb Dashboard...")
     
@@ -19,7 +23,27 @@ def main():
     
     # Run the simple version (no dependency issues)
     try:
-        subprocess.run([sys.executable, "-m", "streamlit", "run", "app_simple.py"])
+        try:
+            from streamlit import config
+            from streamlit.web import bootstrap
+        except ImportError:
+            bootstrap = None
+        
+        if bootstrap is not None:
+            # Warm the app's heavy imports so the first page load doesn't pay for them
+            for module in PREWARM_MODULES:
+                try:
+                    importlib.import_module(module)
+                except ImportError:
+                    pass
+            
+            # Serve from this interpreter instead of booting a second one, set up as `streamlit run` does
+            main_script_path = os.path.abspath("app_simple.py")
+            config._main_script_path = main_script_path
+            bootstrap.load_config_options(flag_options={})
+            bootstrap.run(main_script_path, False, [], {})
+        else:
+            subprocess.run([sys.executable, "-m", "streamlit", "run", "app_simple.py"])
     except KeyboardInterrupt:
         print("\n👋 Goodbye!")
 
@@ -0,0 +1,113 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pytest
+
+from utils.data import read_cached_csv, read_csv_pyarrow, sample_csv_rows
+
+MULTILINE_CSV = 'id,description,price\n1,"Bright flat\nnear the park",85\n2,"Quiet room",40\n'
+
+
+def test_read_csv_pyarrow_keeps_quoted_newlines(tmp_path):
+    csv_path = tmp_path / "listings.csv"
+    # Several MB so the quoted newlines fall across pyarrow's parse blocks
+    rows = ''.join(f'{i},"Bright flat\nnear the park",85\n' for i in range(200_000))
+    csv_path.write_text('id,description,price\n' + rows)
+
+    df = read_csv_pyarrow(csv_path)
+
+    assert len(df) == 200_000
+    assert df['id'].iloc[-1] == 199_999
+    assert (df['description'] == "Bright flat\nnear the park").all()
+    assert (df['price'] == 85).all()
+
+
+def test_read_cached_csv_writes_cache_atomically(tmp_path):
+    csv_path = tmp_path / "listings.csv"
+    csv_path.write_text(MULTILINE_CSV)
+
+    df = read_cached_csv(csv_path, columns=['id', 'price'])
+
+    assert df['price'].tolist() == [85, 40]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["listings.csv", "listings.parquet"]
+
+
+def test_read_cached_csv_rebuilds_unreadable_cache(tmp_path):
+    csv_path = tmp_path / "listings.csv"
+    csv_path.write_text(MULTILINE_CSV)
+    cache_path = tmp_path / "listings.parquet"
+    # A truncated cache that is still newer than the CSV
+    cache_path.write_bytes(b"PAR1")
+    os.utime(cache_path, (csv_path.stat().st_mtime + 10,) * 2)
+
+    df = read_cached_csv(csv_path)
+
+    assert df['description'].tolist() == ["Bright flat\nnear the park", "Quiet room"]
+    pd.testing.assert_frame_equal(pd.read_parquet(cache_path), df)
+
+
+def test_read_cached_csv_missing_column_fails_without_rebuilding(tmp_path):
+    csv_path = tmp_path / "listings.csv"
+    csv_path.write_text(MULTILINE_CSV)
+    read_cached_csv(csv_path)
+    parses = []
+
+    def parse(path):
+        parses.append(path)
+        return read_csv_pyarrow(path)
+
+    with pytest.raises(Exception, match="review_scores_location"):
+        read_cached_csv(csv_path, columns=['id', 'review_scores_location'], parse=parse)
+    assert parses == []
+
+
+def write_numbered_csv(path, rows):
+    path.write_text('id,text\n' + ''.join(f'{i},"review {i}"\n' for i in range(rows)))
+
+
+def test_sample_csv_rows_same_seed_same_rows(tmp_path):
+    csv_path = tmp_path / "reviews.csv"
+    write_numbered_csv(csv_path, 100_000)
+
+    first = sample_csv_rows(csv_path, 500, seed=7)
+    second = sample_csv_rows(csv_path, 500, seed=7)
+    other = sample_csv_rows(csv_path, 500, seed=8)
+
+    assert len(first) == 500
+    pd.testing.assert_frame_equal(first, second)
+    assert first['id'].tolist() != other['id'].tolist()
+    assert first['id'].is_monotonic_increasing
+
+
+def test_sample_csv_rows_returns_every_row_when_n_exceeds_file(tmp_path):
+    csv_path = tmp_path / "reviews.csv"
+    write_numbered_csv(csv_path, 50)
+
+    sample = sample_csv_rows(csv_path, 1000)
+
+    assert sample['id'].tolist() == list(range(50))
+
+
+def test_sample_csv_rows_filters_before_sampling(tmp_path):
+    csv_path = tmp_path / "reviews.csv"
+    write_numbered_csv(csv_path, 10_000)
+
+    sample = sample_csv_rows(csv_path, 100, row_filter=lambda batch: pc.equal(pc.bit_wise_and(batch.column('id'), 1), 0))
+
+    assert len(sample) == 100
+    assert (sample['id'] % 2 == 0).all()
+
+
+def test_sample_csv_rows_keeps_quoted_newlines_across_blocks(tmp_path):
+    csv_path = tmp_path / "reviews.csv"
+    # Each field is ~1 KiB, so the file spans several 1 MiB reader blocks
+    body = "line\n" * 200
+    csv_path.write_text('id,text\n' + ''.join(f'{i},"{body}"\n' for i in range(5_000)))
+    assert csv_path.stat().st_size > 3 * (1 << 20)
+
+    sample = sample_csv_rows(csv_path, 10_000, column_types={'text': pa.string()})
+
+    assert sample['id'].tolist() == list(range(5_000))
+    assert (sample['text'] == body).all()
@@ -0,0 +1,172 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import streamlit as st
+
+# ------------------ COLUMNS ------------------
+# Union of the columns the pages use; everything else stays on disk
+LISTINGS_COLUMNS = ['id', 'name', 'host_name', 'neighbourhood', 'latitude', 'longitude', 'price', 'room_type']
+LISTINGS_DTYPES = {
+    'latitude': 'float32', 'longitude': 'float32', 'price': 'float32',
+    'host_name': 'category', 'neighbourhood': 'category', 'room_type': 'category'
+}
+DETAILED_COLUMNS = ['id', 'accommodates', 'review_scores_rating']
+DETAILED_DTYPES = {'accommodates': 'int32', 'review_scores_rating': 'float32'}
+
+DATA_DIR = Path("Data")
+# Shared by both dashboards, so they read and write the same review sample
+REVIEWS_SAMPLE_CACHE = 'reviews-2k.parquet'
+
+# ------------------ READERS ------------------
+def load_calendar(file_path):
+    """Load the calendar with dates and prices parsed in a single pass"""
+    calendar = pd.read_csv(file_path, engine='pyarrow', dtype_backend='pyarrow', parse_dates=['date'])
+    
+    # Prices arrive as strings like "$1,234.00"; strip both symbols with one regex pass
+    for col in ('price', 'adjusted_price'):
+        if col in calendar.columns and pd.api.types.is_string_dtype(calendar[col]):
+            calendar[col] = pd.to_numeric(calendar[col].str.replace(r'[$,]', '', regex=True), downcast='float')
+    
+    return calendar
+
+def read_csv_pyarrow(file_path):
+    """Parse a full CSV with the multi-threaded pyarrow reader, allowing quoted multi-line text"""
+    return pa_csv.read_csv(file_path, parse_options=pa_csv.ParseOptions(newlines_in_values=True)).to_pandas()
+
+def write_parquet_atomic(df, cache_path):
+    """Write a Parquet file next to its final path and move it into place in one step"""
+    fd, tmp_name = tempfile.mkstemp(dir=cache_path.parent, prefix=f".{cache_path.name}.", suffix='.tmp')
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_name, compression='zstd')
+        # Readers only ever see the old cache or the complete new one
+        os.replace(tmp_name, cache_path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+def parquet_readable(path):
+    """Whether a Parquet file's footer and schema can be opened"""
+    try:
+        pq.read_schema(path)
+        return True
+    except (OSError, ValueError):
+        return False
+
+def read_cached_csv(file_path, columns=None, parse=read_csv_pyarrow, cache_path=None, **parquet_kwargs):
+    """Read a CSV through a sibling Parquet cache, rebuilding it whenever the CSV is newer"""
+    cache_path = cache_path or file_path.with_suffix('.parquet')
+    
+    # Only a cache whose footer cannot be opened is rebuilt; a bad column projection still fails fast
+    if cache_path.exists() and cache_path.stat().st_mtime >= file_path.stat().st_mtime and parquet_readable(cache_path):
+        return pd.read_parquet(cache_path, columns=columns, **parquet_kwargs)
+    
+    df = parse(file_path)
+    try:
+        write_parquet_atomic(df, cache_path)
+    except OSError:
+        # Read-only data directory: serve the parsed frame without caching
+        return df if columns is None else df[columns]
+    
+    return pd.read_parquet(cache_path, columns=columns, **parquet_kwargs)
+
+def sample_csv_rows(file_path, n, columns=None, column_types=None, row_filter=None, types_mapper=None, seed=42):
+    """Uniformly sample n rows while streaming a CSV, keeping at most n rows in memory"""
+    reader = pa_csv.open_csv(
+        file_path,
+        read_options=pa_csv.ReadOptions(block_size=1 << 20),
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(include_columns=columns, column_types=column_types)
+    )
+    rng = np.random.default_rng(seed)
+    
+    # Every row draws a random priority; keeping the n lowest priorities seen so far
+    # is a reservoir sample that stays uniform across batches
+    sample, priorities = reader.schema.empty_table(), np.empty(0)
+    for batch in reader:
+        if row_filter is not None:
+            batch = batch.filter(row_filter(batch))
+        sample = pa.concat_tables([sample, pa.Table.from_batches([batch])])
+        priorities = np.concatenate([priorities, rng.random(batch.num_rows)])
+        if sample.num_rows > n:
+            keep = np.sort(np.argpartition(priorities, n)[:n])
+            sample, priorities = sample.take(keep), priorities[keep]
+    
+    return sample.to_pandas(types_mapper=types_mapper)
+
+def sample_reviews(file_path):
+    """Draw the fixed 2000-review sample that is cached as its own Parquet file"""
+    return sample_csv_rows(file_path, 2000, column_types={'comments': pa.string()})
+
+# ------------------ LOADERS ------------------
+@st.cache_resource
+def load_data():
+    """Load listings and detailed listings once, shared by every page and session"""
+    if not DATA_DIR.exists():
+        st.error("❌ Data directory not found!")
+        return None, None
+    
+    try:
+        listings = read_cached_csv(DATA_DIR / "listings.csv", columns=LISTINGS_COLUMNS).astype(LISTINGS_DTYPES)
+        # Presorted by price so price filters are a binary search
+        listings = listings.sort_values('price', kind='stable').reset_index(drop=True)
+        detailed_listings = read_cached_csv(DATA_DIR / "listings-2.csv", columns=DETAILED_COLUMNS).astype(DETAILED_DTYPES)
+        detailed_listings = detailed_listings.set_index('id').sort_index()
+        return listings, detailed_listings
+    except Exception as e:
+        st.error(f"❌ Error loading data: {e}")
+        return None, None
+
+@st.cache_resource
+def load_geo_json():
+    """Neighbourhood boundaries as a simplified GeoJSON dict, or None when unavailable"""
+    geo_path = DATA_DIR / "neighbourhoods.geojson"
+    if not geo_path.exists():
+        return None
+    
+    try:
+        import geopandas as gpd
+    except ImportError:
+        st.warning("⚠️ GeoPandas not available. Some map features will be limited.")
+        return None
+    
+    try:
+        # Simplify to 50 m in British National Grid, then serialise once so Choropleth gets a plain dict
+        geo_frame = gpd.read_file(geo_path).to_crs(27700)
+        geo_frame['geometry'] = geo_frame.geometry.simplify(50, preserve_topology=True)
+        return json.loads(geo_frame.to_crs(4326).to_json())
+    except Exception as e:
+        st.error(f"❌ Error loading neighbourhood boundaries: {e}")
+        return None
+
+# ------------------ AGGREGATES ------------------
+@st.cache_data
+def join_detailed(_listings, _detailed_listings, columns):
+    """Attach only the requested detailed-listing columns, joined on the id index"""
+    return _listings.join(_detailed_listings[list(columns)], on='id', how='inner')
+
+@st.cache_data
+def neighborhood_stats(_listings, start=0, stop=None):
+    """Per-neighbourhood price and location aggregates for a row range of the price-sorted listings"""
+    # Keyed on the row range instead of hashing the frame on every rerun
+    return _listings.iloc[start:stop].groupby('neighbourhood', observed=True, sort=False, as_index=False).agg(
+        avg_price=('price', 'mean'),
+        listing_count=('price', 'count'),
+        lat=('latitude', 'mean'),
+        lon=('longitude', 'mean')
+    )
+
+def top_k(counts, k):
+    """Positions of the k largest counts, largest first, without sorting every count"""
+    k = min(k, len(counts))
+    if k == 0:
+        return np.array([], dtype=np.intp)
+    top = np.argpartition(-counts, k - 1)[:k]
+    return top[np.argsort(-counts[top], kind='stable')]